@@ -0,0 +1,127 @@
+"""
+CQDAM Benchmark Data Loader
+Shared ingestion of ../data/bench for the analysis scripts
+
+Organization: Laminar Instruments Inc.
+"""
+
+import numpy as np
+import csv
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+DATA_DIR = "../data/bench"
+CACHE_PATH = ".bench_cache.parquet"
+CACHE_KEY = b"cqdam.bench_data_dir"
+
+def list_csv_files(data_dir=DATA_DIR):
+    """Paths of the *.csv files directly inside data_dir"""
+    try:
+        with os.scandir(data_dir) as it:
+            return [entry.path for entry in it if entry.name.endswith('.csv')]
+    except FileNotFoundError:
+        return []
+
+def filename_param(csv_file, prefix):
+    """Integer of the first name token that is prefix + digits (cqdam_C50_P100.csv -> C=50), or None"""
+    stem = os.path.splitext(os.path.basename(csv_file))[0]
+    for token in stem.replace('-', '_').replace('.', '_').split('_'):
+        value = token[len(prefix):]
+        if token.startswith(prefix) and value.isdigit():
+            return int(value)
+    return None
+
+def read_first_row(csv_file):
+    """Return the first data row of a benchmark CSV as a {column: value} dict"""
+    with open(csv_file, newline='') as fh:
+        reader = csv.reader(fh)
+        header = next(reader, None)
+        row = next(reader, None)
+    if header is None or row is None:
+        return {}
+    return dict(zip(header, row))
+
+def parse_bench_file(csv_file):
+    """Parse one benchmark CSV into a data row, or None if it carries no throughput"""
+    try:
+        fields = read_first_row(csv_file)
+        if 'rps' in fields:
+            # Extract parameters from filename
+            p = filename_param(csv_file, 'P')
+            c = filename_param(csv_file, 'C')
+            
+            if p is not None:
+                c = 50 if c is None else c
+                rps = float(fields['rps'])
+                
+                row = {
+                    'pipeline_depth': p,
+                    'clients': c,
+                    'throughput_ops_s': rps,
+                    'throughput_Mops_s': rps / 1e6,
+                    'filename': os.path.basename(csv_file)
+                }
+                
+                # Add latency data if available
+                for column in ('p50_latency_ms', 'p95_latency_ms', 'p99_latency_ms'):
+                    if column in fields:
+                        row[column] = float(fields[column]) if fields[column] else np.nan
+                
+                return row
+    except Exception as e:
+        print(f"Skipping {csv_file}: {e}")
+    return None
+
+def parse_bench_files(csv_files):
+    """Parse benchmark CSVs concurrently; returns one row (or None) per file, in order"""
+    # Files are independent; overlap their reads
+    with ThreadPoolExecutor() as executor:
+        return list(executor.map(parse_bench_file, csv_files))
+
+def _cached_data_dir(cache_path):
+    """Resolved data directory recorded in a Parquet snapshot, or None"""
+    import pyarrow.parquet as pq
+    
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except (OSError, ValueError):
+        return None
+    data_dir = metadata.get(CACHE_KEY)
+    return data_dir.decode() if data_dir else None
+
+def load(data_dir=DATA_DIR, cache_path=CACHE_PATH):
+    """
+    Load all benchmark rows under data_dir as a DataFrame
+    Reuses a Parquet snapshot at cache_path while it was taken from the same
+    directory and is newer than the CSVs. Results are memoized per resolved
+    directory; each call returns its own copy, so callers may modify it.
+    """
+    return _load(os.path.abspath(data_dir), os.path.abspath(cache_path)).copy()
+
+@functools.lru_cache(maxsize=None)
+def _load(data_dir, cache_path):
+    """Uncopied, memoized body of load(); paths are already resolved"""
+    import pandas as pd
+    
+    csv_files = list_csv_files(data_dir)
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        newest = max(os.path.getmtime(path) for path in [data_dir] + csv_files)
+    except (ImportError, OSError):
+        newest = None
+    
+    if (newest is not None and os.path.exists(cache_path)
+            and os.path.getmtime(cache_path) > newest
+            and _cached_data_dir(cache_path) == data_dir):
+        return pd.read_parquet(cache_path, engine='pyarrow')
+    
+    data = pd.DataFrame([row for row in parse_bench_files(csv_files) if row])
+    if newest is not None and not data.empty:
+        # Record the source directory so a snapshot of another directory is a miss
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[CACHE_KEY] = data_dir.encode()
+        pq.write_table(table.replace_schema_metadata(metadata), cache_path)
+    return data
@@ -9,86 +9,101 @@ Date: September 15, 2025
 """
 
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from scipy import stats
-import glob
-import os
+from scipy.special import stdtrit
+from bench_loader import DATA_DIR, load
 
-def fit_batched_service_model(csv_files):
+try:
+    from numba import njit
+except ImportError:  # numba is optional; run the fit core as plain Python
+    def njit(**kwargs):
+        return lambda f: f
+
+@njit(cache=True, error_model='numpy')
+def _fit_core(x, y):
     """
-    Fit T(p) = p/(t0 + t1p) model to benchmark data
-    Returns t0, t1, R², and confidence intervals
+    Ordinary least squares for y = t0 + t1*x in a single fused pass
+    Returns t0, t1, R² and the standard errors of t0 and t1
+    Inputs may be float32; all sums are accumulated in float64
     """
+    n = x.shape[0]
+    
+    # Sums are taken about the first point so the moment identities below do not cancel
+    kx = np.float64(x[0])
+    ky = np.float64(y[0])
+    sx = 0.0
+    sy = 0.0
+    sxx = 0.0
+    sxy = 0.0
+    syy = 0.0
+    for i in range(n):
+        dx = np.float64(x[i]) - kx
+        dy = np.float64(y[i]) - ky
+        sx += dx
+        sy += dy
+        sxx += dx * dx
+        sxy += dx * dy
+        syy += dy * dy
+    
+    # Central moments: S_xx, S_xy and S_yy (= ss_tot)
+    sxx -= sx * sx / n
+    sxy -= sx * sy / n
+    syy -= sy * sy / n
+    x_mean = kx + sx / n
+    y_mean = ky + sy / n
+    
+    t1 = sxy / sxx
+    t0 = y_mean - t1 * x_mean
+    ss_res = max(syy - t1 * sxy, 0.0)
+    r_squared = 1 - ss_res / syy
     
-    # Collect data from all CSV files
-    data_points = []
+    # Standard errors (simplified)
+    mse = ss_res / (n - 2)
+    se_t1 = np.sqrt(mse / sxx)
+    se_t0 = np.sqrt(mse * (1/n + x_mean**2/sxx))
+    return t0, t1, r_squared, se_t0, se_t1
+
+def fit_batched_service_model(data):
+    """
+    Fit T(p) = p/(t0 + t1p) model to benchmark data (rows from bench_loader.load)
+    Returns t0, t1, R², and confidence intervals
+    """
     
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file)
-            if 'rps' in df.columns and len(df) > 0:
-                # Extract pipeline depth from filename
-                import re
-                p_match = re.search(r'P(\d+)', csv_file)
-                if p_match:
-                    p = int(p_match.group(1))
-                    throughput = df['rps'].iloc[0]  # ops/sec
-                    data_points.append((p, throughput))
-        except Exception as e:
-            print(f"Skipping {csv_file}: {e}")
-    
-    if len(data_points) < 5:
+    if len(data) < 5:
         print("Insufficient data points for fitting")
         return None
     
-    # Convert to arrays
-    data_points.sort()  # Sort by pipeline depth
-    p_values = np.array([point[0] for point in data_points])
-    T_values = np.array([point[1] for point in data_points])  # throughput
+    # Convert to arrays, sorted by pipeline depth
+    data = data.sort_values(['pipeline_depth', 'throughput_ops_s'])
+    p_values = data['pipeline_depth'].values
+    T_values = data['throughput_ops_s'].values  # throughput
     
     # Linearize: y = p/T = t0 + t1*p where T is in ops/sec, so p/T is in seconds
-    T_ops_per_sec = T_values
-    y = p_values / T_ops_per_sec  # seconds per batch
-    x = p_values
+    # The fit inputs are float32 (half the memory traffic); _fit_core accumulates in float64
+    x = p_values.astype(np.float32)
+    y = x / T_values.astype(np.float32)  # seconds per batch
     
-    # Ordinary least squares
-    coeffs = np.polyfit(x, y, 1)
-    t1_sec, t0_sec = coeffs  # slope (sec/op), intercept (sec/batch)
+    # Ordinary least squares: t0 (sec/batch), t1 (sec/op)
+    t0_sec, t1_sec, r_squared, se_t0_sec, se_t1_sec = _fit_core(x, y)
+    n = len(x)
     
     # Convert units for paper
     t0_us = t0_sec * 1e6  # convert to microseconds/batch
     t1_ns = t1_sec * 1e9  # convert to nanoseconds/op
     
-    # Calculate R²
-    y_pred = t0_sec + t1_sec * x
-    ss_res = np.sum((y - y_pred)**2)
-    ss_tot = np.sum((y - np.mean(y))**2)
-    r_squared = 1 - (ss_res / ss_tot)
-    
-    # Standard errors (simplified)
-    n = len(x)
-    mse = ss_res / (n - 2)
-    x_mean = np.mean(x)
-    sxx = np.sum((x - x_mean)**2)
-    
-    se_t1_sec = np.sqrt(mse / sxx)
-    se_t0_sec = np.sqrt(mse * (1/n + x_mean**2/sxx))
-    
     # 95% confidence intervals
-    t_crit = stats.t.ppf(0.975, n-2)
+    t_crit = stdtrit(n-2, 0.975)
     t0_ci = [t0_us - t_crit*se_t0_sec*1e6, t0_us + t_crit*se_t0_sec*1e6]
     t1_ci = [t1_ns - t_crit*se_t1_sec*1e9, t1_ns + t_crit*se_t1_sec*1e9]
     
     results = {
-        't0_us_per_batch': float(t0_us),
-        't1_ns_per_op': float(t1_ns),
-        'r_squared': float(r_squared),
-        't0_confidence_interval': [float(x) for x in t0_ci],
-        't1_confidence_interval': [float(x) for x in t1_ci],
-        'Tmax_Mops_s': float(1/(t1_sec*1e6)) if t1_sec > 0 else float('inf'),  # Theoretical maximum
-        'data_points': int(len(data_points)),
-        'raw_data': [[float(p), float(T)] for p, T in zip(p_values, T_values)]
+        't0_us_per_batch': t0_us,
+        't1_ns_per_op': t1_ns,
+        'r_squared': r_squared,
+        't0_confidence_interval': t0_ci,
+        't1_confidence_interval': t1_ci,
+        'Tmax_Mops_s': 1/(t1_sec*1e6) if t1_sec > 0 else None,  # Theoretical maximum; None (null) when unbounded
+        'data_points': len(data),
+        'raw_data': np.column_stack((p_values, T_values))  # rows of [p, T]
     }
     
     return results
@@ -97,6 +112,11 @@ def generate_figure(results, output_path):
     """Generate the throughput vs pipeline depth figure"""
     if not results:
         return
+    
+    # Deferred so fitting alone does not pay for the matplotlib import
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
         
     p_values, T_values = zip(*results['raw_data'])
     p_values = np.array(p_values)
@@ -107,10 +127,13 @@ def generate_figure(results, output_path):
     t1 = results['t1_ns_per_op'] * 1e-9    # Convert to seconds
     
     p_model = np.linspace(1, max(p_values)*1.2, 200)
-    T_model = p_model / (t0 + t1 * p_model) / 1e6  # Convert to Mops/s
+    T_model = np.multiply(p_model, t1)  # Denominator t0 + t1*p, evaluated in place
+    T_model += t0
+    np.divide(p_model, T_model, out=T_model)
+    T_model /= 1e6  # Convert to Mops/s
     
     plt.figure(figsize=(10, 6))
-    plt.scatter(p_values, T_values/1e6, color='blue', s=50, label='Measured', zorder=3)
+    plt.plot(p_values, T_values/1e6, 'o', color='blue', markersize=7, linestyle='None', label='Measured', zorder=3)
     plt.plot(p_model, T_model, 'r-', linewidth=2, 
              label=f'Model: T(p) = p/({results["t0_us_per_batch"]:.2f} + {results["t1_ns_per_op"]:.1f}p)', 
              zorder=2)
@@ -133,18 +156,18 @@ def generate_figure(results, output_path):
     plt.close()
 
 def main():
-    # Find all benchmark CSV files
-    data_dir = "../data/bench"
-    csv_files = glob.glob(os.path.join(data_dir, "*.csv"))
+    # Load all benchmark data
+    data_dir = DATA_DIR
+    data = load(data_dir)
     
-    if not csv_files:
-        print(f"No CSV files found in {data_dir}")
+    if data.empty:
+        print(f"No benchmark data found in {data_dir}")
         return
     
-    print(f"Processing {len(csv_files)} CSV files...")
+    print(f"Loaded {len(data)} data points from {data['filename'].nunique()} files")
     
     # Fit the model
-    results = fit_batched_service_model(csv_files)
+    results = fit_batched_service_model(data)
     
     if results:
         print("\nCQDAM Throughput Model Results:")
@@ -152,7 +175,10 @@ def main():
         print(f"t₀ = {results['t0_us_per_batch']:.2f} μs/batch [{results['t0_confidence_interval'][0]:.2f}, {results['t0_confidence_interval'][1]:.2f}]")
         print(f"t₁ = {results['t1_ns_per_op']:.1f} ns/op [{results['t1_confidence_interval'][0]:.1f}, {results['t1_confidence_interval'][1]:.1f}]")
         print(f"R² = {results['r_squared']:.6f}")
-        print(f"Tₘₐₓ = {results['Tmax_Mops_s']:.2f} Mops/s")
+        if results['Tmax_Mops_s'] is not None:
+            print(f"Tₘₐₓ = {results['Tmax_Mops_s']:.2f} Mops/s")
+        else:
+            print("Tₘₐₓ = unbounded (t₁ ≤ 0)")
         print(f"Data points: {results['data_points']}")
         
         # Generate figure
@@ -160,9 +186,14 @@ def main():
         print(f"\nFigure saved: throughput_vs_pipeline_model.png")
         
         # Save results
-        import json
-        with open("model_fit_results.json", 'w') as f:
-            json.dump(results, f, indent=2)
+        try:
+            import orjson
+            payload = orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+        except ImportError:  # orjson is optional; NumPy values go through tolist()
+            import json
+            payload = json.dumps(results, indent=2, default=lambda o: o.tolist()).encode()
+        with open("model_fit_results.json", 'wb') as f:
+            f.write(payload)
         print("Results saved: model_fit_results.json")
         
     else:
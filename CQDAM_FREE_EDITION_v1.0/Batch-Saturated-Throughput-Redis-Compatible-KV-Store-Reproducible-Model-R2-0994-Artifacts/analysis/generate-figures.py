@@ -9,12 +9,12 @@ Date: September 15, 2025
 """
 
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Headless rendering; no GUI backend probing
 import matplotlib.pyplot as plt
-import pandas as pd
-import glob
 import os
-import re
 from pathlib import Path
+from bench_loader import DATA_DIR, load
 
 # Set publication-quality defaults
 plt.rcParams.update({
@@ -29,109 +29,84 @@ plt.rcParams.update({
     'savefig.bbox': 'tight'
 })
 
-def load_benchmark_data(data_dir="../data/bench"):
-    """Load and organize benchmark data"""
-    csv_files = glob.glob(os.path.join(data_dir, "*.csv"))
-    data = []
-    
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file)
-            if 'rps' in df.columns:
-                # Extract parameters from filename
-                p_match = re.search(r'P(\d+)', csv_file)
-                c_match = re.search(r'C(\d+)', csv_file)
-                
-                if p_match:
-                    p = int(p_match.group(1))
-                    c = int(c_match.group(1)) if c_match else 50
-                    
-                    row = {
-                        'pipeline_depth': p,
-                        'clients': c,
-                        'throughput_ops_s': df['rps'].iloc[0],
-                        'throughput_Mops_s': df['rps'].iloc[0] / 1e6,
-                        'filename': os.path.basename(csv_file)
-                    }
-                    
-                    # Add latency data if available
-                    if 'p50_latency_ms' in df.columns:
-                        row['p50_latency_ms'] = df['p50_latency_ms'].iloc[0]
-                    if 'p95_latency_ms' in df.columns:
-                        row['p95_latency_ms'] = df['p95_latency_ms'].iloc[0]
-                    if 'p99_latency_ms' in df.columns:
-                        row['p99_latency_ms'] = df['p99_latency_ms'].iloc[0]
-                    
-                    data.append(row)
-        except Exception as e:
-            print(f"Skipping {csv_file}: {e}")
-    
-    return pd.DataFrame(data)
+def _ols1(x, y):
+    """Closed-form least-squares line y = intercept + slope*x; returns (slope, intercept, R²)"""
+    xm = x.mean()
+    ym = y.mean()
+    dx = x - xm
+    dy = y - ym
+    sxx = dx @ dx
+    slope = (dx @ dy) / sxx
+    resid = dy - slope * dx
+    r_squared = 1 - (resid @ resid) / (dy @ dy)
+    return slope, ym - slope * xm, r_squared
 
-def figure1_throughput_vs_pipeline(data, output_dir="."):
+def _model_params(fit):
+    """Derive the paper-unit parameters and knee of T(p) from an (t1, t0, R²) fit in seconds"""
+    t1, t0, r_squared = fit
+    return {
+        't0': t0,
+        't1': t1,
+        't0_us': t0 * 1e6,  # microseconds/batch
+        't1_ns': t1 * 1e9,  # nanoseconds/op
+        'r_squared': r_squared,
+        'knee_p': t0 / t1
+    }
+
+def _build_model_curve(t0, t1, p_max, n=200):
+    """Sample T(p) = p/(t0 + t1*p) on [1, 1.2*p_max]; returns (p, T in Mops/s)"""
+    p_model = np.linspace(1, p_max * 1.2, n)
+    
+    # Evaluate in place in a single buffer: denominator, then quotient
+    T_model = np.multiply(p_model, t1)
+    T_model += t0
+    np.divide(p_model, T_model, out=T_model)
+    T_model /= 1e6  # Convert to Mops/s
+    return p_model, T_model
+
+def figure1_throughput_vs_pipeline(c50_data, model, output_dir=".", model_grid=None):
     """Figure 1: Throughput vs pipeline with model overlay"""
-    # Filter for C=50 data
-    c50_data = data[data['clients'] == 50].copy()
     if c50_data.empty:
         print("No C=50 data found for Figure 1")
         return
     
-    c50_data = c50_data.sort_values('pipeline_depth')
-    
-    # Fit model T(p) = p/(t0 + t1*p)
     p_vals = c50_data['pipeline_depth'].values
     T_vals = c50_data['throughput_ops_s'].values
     
-    # Linearize: y = p/T = t0 + t1*p
-    y = p_vals / T_vals
-    x = p_vals
-    coeffs = np.polyfit(x, y, 1)
-    t1, t0 = coeffs
-    
-    # Convert to paper units
-    t0_us = t0  # microseconds/batch
-    t1_ns = t1 * 1000  # nanoseconds/op
-    
-    # Calculate R²
-    y_pred = t0 + t1 * x
-    r_squared = 1 - np.sum((y - y_pred)**2) / np.sum((y - np.mean(y))**2)
-    
-    # Generate model curve
-    p_model = np.linspace(1, max(p_vals) * 1.2, 200)
-    T_model = p_model / (t0 + t1 * p_model) / 1e6  # Convert to Mops/s
+    # Model curve, built by the caller when shared
+    if model_grid is None:
+        model_grid = _build_model_curve(model['t0'], model['t1'], max(p_vals))
+    p_model, T_model = model_grid
     
-    plt.figure(figsize=(10, 6))
-    plt.scatter(p_vals, T_vals/1e6, color='blue', s=60, label='Measured', zorder=3, alpha=0.8)
-    plt.plot(p_model, T_model, 'r-', linewidth=2, 
-             label=f'Model: T(p) = p/({t0_us:.2f} + {t1_ns:.1f}p)', zorder=2)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(p_vals, T_vals/1e6, 'o', color='blue', markersize=7.75, linestyle='None', label='Measured', zorder=3, alpha=0.8)
+    ax.plot(p_model, T_model, 'r-', linewidth=2, 
+            label=f'Model: T(p) = p/({model["t0_us"]:.2f} + {model["t1_ns"]:.1f}p)', zorder=2)
     
     # Annotate knee
-    knee_p = t0 / t1
-    plt.annotate(f'Knee at p ≈ {knee_p:.0f}', xy=(knee_p, 2), 
-                xytext=(knee_p*1.5, 1.5), fontsize=11,
-                arrowprops=dict(arrowstyle='->', color='black', lw=1))
-    
-    plt.xlabel('Pipeline Depth (p)')
-    plt.ylabel('Throughput (Mops/s)')
-    plt.title('Throughput vs Pipeline with Model Overlay')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.xlim(0, max(p_vals) * 1.1)
-    plt.ylim(0, max(T_vals/1e6) * 1.1)
-    
-    plt.savefig(os.path.join(output_dir, 'figure1_throughput_vs_pipeline.png'))
-    plt.close()
-    
-    return {'t0_us': t0_us, 't1_ns': t1_ns, 'r_squared': r_squared}
+    knee_p = model['knee_p']
+    ax.annotate(f'Knee at p ≈ {knee_p:.0f}', xy=(knee_p, 2), 
+               xytext=(knee_p*1.5, 1.5), fontsize=11,
+               arrowprops=dict(arrowstyle='->', color='black', lw=1))
+    
+    ax.set_xlabel('Pipeline Depth (p)')
+    ax.set_ylabel('Throughput (Mops/s)')
+    ax.set_title('Throughput vs Pipeline with Model Overlay')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    ax.set_xlim(0, max(p_vals) * 1.1)
+    ax.set_ylim(0, max(T_vals/1e6) * 1.1)
+    
+    fig.savefig(os.path.join(output_dir, 'figure1_throughput_vs_pipeline.png'))
+    plt.close(fig)
+    
+    return model
 
-def figure2_linearized_fit(data, output_dir="."):
+def figure2_linearized_fit(c50_data, model, output_dir="."):
     """Figure 2: Linearized fit p/T vs p"""
-    c50_data = data[data['clients'] == 50].copy()
     if c50_data.empty:
         return
     
-    c50_data = c50_data.sort_values('pipeline_depth')
-    
     p_vals = c50_data['pipeline_depth'].values
     T_vals = c50_data['throughput_ops_s'].values
     
@@ -139,75 +114,60 @@ def figure2_linearized_fit(data, output_dir="."):
     y = p_vals / T_vals * 1e6  # Convert to μs
     x = p_vals
     
-    # Fit
-    coeffs = np.polyfit(x, y, 1)
-    t1, t0 = coeffs
+    # Fit shared with Figure 1: intercept in μs, slope in μs/op
+    t0 = model['t0_us']
+    t1 = model['t1_ns'] / 1000
     
     # Model line
     x_model = np.linspace(0, max(x) * 1.1, 100)
     y_model = t0 + t1 * x_model
     
-    # Calculate R²
-    y_pred = t0 + t1 * x
-    r_squared = 1 - np.sum((y - y_pred)**2) / np.sum((y - np.mean(y))**2)
-    
-    plt.figure(figsize=(10, 6))
-    plt.scatter(x, y, color='blue', s=60, alpha=0.8, label='Data', zorder=3)
-    plt.plot(x_model, y_model, 'r-', linewidth=2, 
-             label=f'Fit: y = {t0:.2f} + {t1*1000:.1f}p (R² = {r_squared:.3f})', zorder=2)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(x, y, 'o', color='blue', markersize=7.75, linestyle='None', alpha=0.8, label='Data', zorder=3)
+    ax.plot(x_model, y_model, 'r-', linewidth=2, 
+            label=f'Fit: y = {t0:.2f} + {t1*1000:.1f}p (R² = {model["r_squared"]:.3f})', zorder=2)
     
-    plt.xlabel('Pipeline Depth (p)')
-    plt.ylabel('p/T(p) (μs)')
-    plt.title('Linearized Fit p/T vs p with 95% CIs')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
+    ax.set_xlabel('Pipeline Depth (p)')
+    ax.set_ylabel('p/T(p) (μs)')
+    ax.set_title('Linearized Fit p/T vs p with 95% CIs')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
     
-    plt.savefig(os.path.join(output_dir, 'figure2_linearized_fit.png'))
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'figure2_linearized_fit.png'))
+    plt.close(fig)
 
 def figure3_pipeline_closure(data, C=50, output_dir="."):
     """Figure 3: Pipeline closure verification"""
-    closure_data = []
-    
-    for _, row in data.iterrows():
-        if 'p50_latency_ms' in row and pd.notna(row['p50_latency_ms']):
-            p = row['pipeline_depth']
-            T = row['throughput_ops_s']
-            p50_s = row['p50_latency_ms'] / 1000
-            
-            T_p50s = T * p50_s
-            C_p = C * p
-            
-            closure_data.append({
-                'C_p': C_p,
-                'T_p50s': T_p50s,
-                'pipeline_depth': p
-            })
-    
-    if not closure_data:
+    # Rows with a p50 measurement
+    if 'p50_latency_ms' not in data.columns:
+        print("No latency data available for pipeline closure figure")
+        return
+    m = data['p50_latency_ms'].notna().values
+    if not m.any():
         print("No latency data available for pipeline closure figure")
         return
     
-    closure_df = pd.DataFrame(closure_data)
+    C_p = C * data['pipeline_depth'].values[m]
+    T_p50s = data['throughput_ops_s'].values[m] * data['p50_latency_ms'].values[m] / 1000
     
-    plt.figure(figsize=(8, 8))
-    plt.scatter(closure_df['C_p'], closure_df['T_p50s'], alpha=0.7, s=60, 
-               label='Measured Points', zorder=3)
+    fig, ax = plt.subplots(figsize=(8, 8))
+    ax.plot(C_p, T_p50s, 'o', alpha=0.7, markersize=7.75, linestyle='None', 
+           label='Measured Points', zorder=3)
     
     # y = x line
-    max_val = max(closure_df['C_p'].max(), closure_df['T_p50s'].max()) * 1.1
-    plt.plot([0, max_val], [0, max_val], 'r--', linewidth=2, 
-             label='y = x (Closure Boundary)', zorder=2)
-    
-    plt.xlabel('C · p')
-    plt.ylabel('T · p50s')
-    plt.title('Pipeline Closure Verification')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.axis('equal')
-    
-    plt.savefig(os.path.join(output_dir, 'figure3_pipeline_closure.png'))
-    plt.close()
+    max_val = max(C_p.max(), T_p50s.max()) * 1.1
+    ax.plot([0, max_val], [0, max_val], 'r--', linewidth=2, 
+            label='y = x (Closure Boundary)', zorder=2)
+    
+    ax.set_xlabel('C · p')
+    ax.set_ylabel('T · p50s')
+    ax.set_title('Pipeline Closure Verification')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    ax.axis('equal')
+    
+    fig.savefig(os.path.join(output_dir, 'figure3_pipeline_closure.png'))
+    plt.close(fig)
 
 def figure4_syscalls_vs_inverse_cp(p_values=[1, 10, 50, 100, 200, 500], C=50, output_dir="."):
     """Figure 4: Syscalls/op vs 1/(Cp)"""
@@ -215,23 +175,23 @@ def figure4_syscalls_vs_inverse_cp(p_values=[1, 10, 50, 100, 200, 500], C=50, ou
     inverse_cp = [1/(C*p) for p in p_values]
     syscalls_per_op = [2/(C*p) for p in p_values]
     
-    plt.figure(figsize=(10, 6))
-    plt.plot(inverse_cp, syscalls_per_op, 'ro-', linewidth=2, markersize=8,
-             label='Theory: 2/(Cp)', alpha=0.8)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(inverse_cp, syscalls_per_op, 'ro-', linewidth=2, markersize=8,
+            label='Theory: 2/(Cp)', alpha=0.8)
     
-    plt.xlabel('1/(Cp)')
-    plt.ylabel('Syscalls per Operation')
-    plt.title('Syscalls/op vs 1/(Cp) with Overlay')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
+    ax.set_xlabel('1/(Cp)')
+    ax.set_ylabel('Syscalls per Operation')
+    ax.set_title('Syscalls/op vs 1/(Cp) with Overlay')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
     
     # Add annotations
     for i, p in enumerate(p_values[:3]):  # Annotate first few points
-        plt.annotate(f'p={p}', (inverse_cp[i], syscalls_per_op[i]), 
-                    xytext=(5, 5), textcoords='offset points', fontsize=10)
+        ax.annotate(f'p={p}', (inverse_cp[i], syscalls_per_op[i]), 
+                   xytext=(5, 5), textcoords='offset points', fontsize=10)
     
-    plt.savefig(os.path.join(output_dir, 'figure4_syscalls_vs_inverse_cp.png'))
-    plt.close()
+    fig.savefig(os.path.join(output_dir, 'figure4_syscalls_vs_inverse_cp.png'))
+    plt.close(fig)
 
 def figure5_energy_vs_pipeline(output_dir="."):
     """Figure 5: Energy per operation vs pipeline depth"""
@@ -242,21 +202,21 @@ def figure5_energy_vs_pipeline(output_dir="."):
     cqdam_energy = 2.0 / p_values**0.3  # μJ/op, decreasing with p
     redis_energy = cqdam_energy * 2    # ~2x higher energy
     
-    plt.figure(figsize=(10, 6))
-    plt.plot(p_values, cqdam_energy, 'b-o', linewidth=2, markersize=8,
-             label='CQDAM', alpha=0.8)
-    plt.plot(p_values, redis_energy, 'r-s', linewidth=2, markersize=8,
-             label='Redis', alpha=0.8)
-    
-    plt.xlabel('Pipeline Depth (p)')
-    plt.ylabel('Energy per Operation (μJ/op)')
-    plt.title('μJ/op vs p on macOS and Linux')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.yscale('log')
-    
-    plt.savefig(os.path.join(output_dir, 'figure5_energy_vs_pipeline.png'))
-    plt.close()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(p_values, cqdam_energy, 'b-o', linewidth=2, markersize=8,
+            label='CQDAM', alpha=0.8)
+    ax.plot(p_values, redis_energy, 'r-s', linewidth=2, markersize=8,
+            label='Redis', alpha=0.8)
+    
+    ax.set_xlabel('Pipeline Depth (p)')
+    ax.set_ylabel('Energy per Operation (μJ/op)')
+    ax.set_title('μJ/op vs p on macOS and Linux')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    ax.set_yscale('log')
+    
+    fig.savefig(os.path.join(output_dir, 'figure5_energy_vs_pipeline.png'))
+    plt.close(fig)
 
 def main():
     """Generate all paper figures"""
@@ -264,9 +224,9 @@ def main():
     print("=" * 35)
     
     # Load data
-    data = load_benchmark_data()
+    data = load()
     if data.empty:
-        print("No benchmark data found. Please ensure CSV files are in ../data/bench/")
+        print(f"No benchmark data found. Please ensure CSV files are in {DATA_DIR}/")
         return
     
     print(f"Loaded {len(data)} data points from {data['filename'].nunique()} files")
@@ -278,13 +238,21 @@ def main():
     # Generate all figures
     print("\nGenerating figures...")
     
+    # Figures 1 and 2 share the C=50 sweep, sorted by pipeline depth
+    c50_data = data[data['clients'] == 50].sort_values('pipeline_depth')
+    
+    # Fit T(p) = p/(t0 + t1*p) once, linearized as p/T = t0 + t1*p
+    p_vals = c50_data['pipeline_depth'].values
+    # Derived parameters, knee and model curve are computed once and shared
+    model = _model_params(_ols1(p_vals, p_vals / c50_data['throughput_ops_s'].values)) if len(p_vals) else None
+    model_grid = _build_model_curve(model['t0'], model['t1'], p_vals.max()) if model else None
+    
     # Figure 1: Main throughput model
-    model_params = figure1_throughput_vs_pipeline(data, output_dir)
-    if model_params:
-        print(f"Figure 1: t₀={model_params['t0_us']:.2f} μs, t₁={model_params['t1_ns']:.1f} ns, R²={model_params['r_squared']:.3f}")
+    if figure1_throughput_vs_pipeline(c50_data, model, output_dir, model_grid=model_grid):
+        print(f"Figure 1: t₀={model['t0_us']:.2f} μs, t₁={model['t1_ns']:.1f} ns, R²={model['r_squared']:.3f}")
     
     # Figure 2: Linearized fit
-    figure2_linearized_fit(data, output_dir)
+    figure2_linearized_fit(c50_data, model, output_dir)
     print("Figure 2: Linearized fit generated")
     
     # Figure 3: Pipeline closure
@@ -9,49 +9,45 @@ Date: September 15, 2025
 """
 
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
-import glob
-import os
-import re
+from bench_loader import DATA_DIR, filename_param, list_csv_files, parse_bench_files
 
 def validate_pipeline_closure(csv_files, C=50):
     """
     Invariant 1: Pipeline closure T · p50s ≤ C · p
     """
-    violations = []
-    valid_points = []
-    
-    for csv_file in csv_files:
-        try:
-            df = pd.read_csv(csv_file)
-            if 'rps' in df.columns and 'p50_latency_ms' in df.columns:
-                p_match = re.search(r'P(\d+)', csv_file)
-                if p_match:
-                    p = int(p_match.group(1))
-                    T = df['rps'].iloc[0]  # ops/sec
-                    p50_ms = df['p50_latency_ms'].iloc[0]  # milliseconds
-                    p50_s = p50_ms / 1000  # convert to seconds
-                    
-                    lhs = T * p50_s  # T · p50s
-                    rhs = C * p      # C · p
-                    
-                    if lhs <= rhs:
-                        valid_points.append((p, lhs, rhs))
-                    else:
-                        violations.append((p, lhs, rhs, csv_file))
-                        
-        except Exception as e:
-            continue
+    parsed = parse_bench_files(csv_files)
+    
+    p_arr = np.empty(len(csv_files), dtype=np.int64)
+    T = np.empty(len(csv_files))       # ops/sec
+    p50_ms = np.empty(len(csv_files))  # milliseconds
+    files = []
+    n = 0
+    for csv_file, row in zip(csv_files, parsed):
+        # A present but empty/NaN p50 stays in: NaN fails lhs <= rhs, so it counts as a violation
+        if row and 'p50_latency_ms' in row:
+            p_arr[n] = row['pipeline_depth']
+            T[n] = row['throughput_ops_s']
+            p50_ms[n] = row['p50_latency_ms']
+            files.append(csv_file)
+            n += 1
+    p_arr, T, p50_ms = p_arr[:n], T[:n], p50_ms[:n]
+    
+    lhs = T * (p50_ms / 1000)  # T · p50s
+    rhs = C * p_arr            # C · p
+    
+    ok = lhs <= rhs
+    violations = np.flatnonzero(~ok)
+    valid_points = (p_arr[ok], lhs[ok], rhs[ok])
     
     print(f"Pipeline Closure Invariant (T · p50s ≤ {C} · p):")
-    print(f"Valid points: {len(valid_points)}")
+    print(f"Valid points: {np.count_nonzero(ok)}")
     print(f"Violations: {len(violations)}")
     
-    if violations:
+    if len(violations):
         print("Violations found:")
-        for p, lhs, rhs, file in violations:
-            print(f"  p={p}: {lhs:.1f} > {rhs} ({file})")
+        for i in violations:
+            print(f"  p={p_arr[i]}: {lhs[i]:.1f} > {rhs[i]} ({files[i]})")
     
     return len(violations) == 0, valid_points
 
@@ -88,16 +84,15 @@ def validate_cycles_per_op_band(csv_files):
 
 def generate_pipeline_closure_figure(valid_points, output_path):
     """Generate pipeline closure validation figure"""
-    if not valid_points:
+    p_vals, lhs_vals, rhs_vals = valid_points
+    if not len(p_vals):
         return
-        
-    p_vals, lhs_vals, rhs_vals = zip(*valid_points)
     
     plt.figure(figsize=(10, 6))
-    plt.scatter(rhs_vals, lhs_vals, alpha=0.7, s=50, label='Measured Points')
+    plt.plot(rhs_vals, lhs_vals, 'o', alpha=0.7, markersize=7, linestyle='None', label='Measured Points')
     
     # y = x line (closure boundary)
-    max_val = max(max(rhs_vals), max(lhs_vals)) * 1.1
+    max_val = max(rhs_vals.max(), lhs_vals.max()) * 1.1
     plt.plot([0, max_val], [0, max_val], 'r--', linewidth=2, label='y = x (Closure Boundary)')
     
     plt.xlabel('C · p')
@@ -114,8 +109,8 @@ def main():
     print("=" * 40)
     
     # Find benchmark data
-    data_dir = "../data/bench"
-    csv_files = glob.glob(os.path.join(data_dir, "*.csv"))
+    data_dir = DATA_DIR
+    csv_files = list_csv_files(data_dir)
     
     if not csv_files:
         print(f"No CSV files found in {data_dir}")
@@ -124,12 +119,8 @@ def main():
     print(f"Processing {len(csv_files)} CSV files...")
     
     # Extract pipeline depths for syscall analysis
-    p_values = []
-    for csv_file in csv_files:
-        p_match = re.search(r'P(\d+)', csv_file)
-        if p_match:
-            p_values.append(int(p_match.group(1)))
-    p_values = sorted(list(set(p_values)))
+    p_values = {filename_param(csv_file, 'P') for csv_file in csv_files}
+    p_values = sorted(p_values - {None})
     
     # Validate all three invariants
     print("\nValidating System Invariants:")
@@ -145,7 +136,7 @@ def main():
     cycles_valid, cycles_estimate = validate_cycles_per_op_band(csv_files)
     
     # Generate figures
-    if closure_points:
+    if len(closure_points[0]):
         generate_pipeline_closure_figure(closure_points, "pipeline_closure_validation.png")
         print(f"\nPipeline closure figure saved: pipeline_closure_validation.png")
     
@@ -159,7 +150,7 @@ def main():
     results = {
         'pipeline_closure': {
             'valid': closure_valid,
-            'points_tested': len(closure_points) if closure_points else 0
+            'points_tested': len(closure_points[0])
         },
         'syscall_budget': {
             'valid': syscall_valid,
@@ -171,9 +162,14 @@ def main():
         }
     }
     
-    import json
-    with open("invariant_validation_results.json", 'w') as f:
-        json.dump(results, f, indent=2)
+    try:
+        import orjson
+        payload = orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+    except ImportError:  # orjson is optional; NumPy values go through tolist()
+        import json
+        payload = json.dumps(results, indent=2, default=lambda o: o.tolist()).encode()
+    with open("invariant_validation_results.json", 'wb') as f:
+        f.write(payload)
     print("Results saved: invariant_validation_results.json")
 
 if __name__ == "__main__":
@@ -127,7 +127,8 @@ print(f'Model Parameters:')
 print(f'  t₀ = {results[\"t0_us_per_batch\"]:.2f} μs/batch')
 print(f'  t₁ = {results[\"t1_ns_per_op\"]:.1f} ns/op')  
 print(f'  R² = {results[\"r_squared\"]:.6f}')
-print(f'  Tₘₐₓ = {results[\"Tmax_Mops_s\"]:.2f} Mops/s')
+tmax = results[\"Tmax_Mops_s\"]
+print(f'  Tₘₐₓ = {tmax:.2f} Mops/s' if tmax is not None else '  Tₘₐₓ = unbounded (t₁ ≤ 0)')
 " 2>/dev/null || echo "Results summary not available"
     else
         echo "Warning: Model fitting may have encountered issues"